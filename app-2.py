@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import gspread
+import os
+import json
+import tempfile
+import time
 from datetime import datetime
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -13,32 +15,131 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+TRADE_TYPES = ("Stock", "Option", "Crypto", "ETF", "Other")
+SNAPSHOT_PATH = "trades_snapshot.json"
+# Same as the load caches' ttl: past this, a full read picks up edits made to earlier rows directly in the sheet
+SNAPSHOT_MAX_AGE = 600
+
 # --- Helper Functions ---
+@st.cache_resource
+def _authorize_gspread():
+    """Authorizes once per server process; failures raise and are not cached."""
+    return gspread.service_account(filename="google_credentials.json")
+
 def get_gspread_client():
     """Connects to Google Sheets using a secret file."""
     try:
-        client = gspread.service_account(filename="google_credentials.json")
+        client = _authorize_gspread()
         return client
     except Exception as e:
         st.error(f"🚨 Connection Error: {e}")
         st.info("Please ensure your 'google_credentials.json' secret file is correctly set up in Render's Environment settings.")
         return None
 
-def process_data(records):
-    """Reusable function to process records into a DataFrame."""
-    if not records:
+@st.cache_resource
+def get_worksheet(_client):
+    """Opens the trade sheet once so reads and writes reuse the same handle."""
+    return _client.open("Trade Tracker Data").sheet1
+
+def column_letter(col):
+    """Returns the A1 column letters for a 1-based column number, e.g. 6 -> 'F', 27 -> 'AA'."""
+    return gspread.utils.rowcol_to_a1(1, col)[:-1]
+
+def load_sheet_values(sheet):
+    """Returns the sheet's raw values, downloading only rows appended since the local snapshot."""
+    try:
+        # The file's mtime is when the sheet was last read in full; delta loads keep it
+        full_read_at = os.path.getmtime(SNAPSHOT_PATH)
+        # Plain JSON rather than pickle: loading it can never run code, whoever wrote the file
+        with open(SNAPSHOT_PATH, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if not isinstance(snapshot, list) or not all(isinstance(row, list) for row in snapshot):
+            raise TypeError("snapshot is not a list of rows")
+    except FileNotFoundError:
+        snapshot = None
+    except Exception:
+        # A corrupt snapshot is a miss; remove it so it cannot fail every later load too
+        snapshot = None
+        clear_snapshot()
+
+    all_values = None
+    if snapshot and len(snapshot) > 1 and time.time() - full_read_at < SNAPSHOT_MAX_AGE:
+        width = len(snapshot[0])
+        last_col = column_letter(width)
+        # Re-read the last snapshotted row too; if it changed, rows were edited or removed
+        tail = [row + [''] * (width - len(row)) for row in sheet.get(f"A{len(snapshot)}:{last_col}")]
+        if tail and tail[0] == snapshot[-1]:
+            all_values = snapshot + tail[1:]
+            changed = len(tail) > 1
+    if all_values is None:
+        all_values = sheet.get_all_values()
+        full_read_at = time.time()
+        changed = all_values != snapshot
+        if not changed:
+            # Same contents: only record the time of this full read
+            try:
+                os.utime(SNAPSHOT_PATH, (full_read_at, full_read_at))
+            except OSError:
+                pass
+    if not changed:
+        return all_values
+
+    # Each session writes its own temp file, so concurrent loads cannot interleave into one file
+    snapshot_dir = os.path.dirname(os.path.abspath(SNAPSHOT_PATH))
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=f"{os.path.basename(SNAPSHOT_PATH)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(all_values, f)
+        os.utime(tmp_path, (full_read_at, full_read_at))
+        os.replace(tmp_path, SNAPSHOT_PATH)
+    except OSError:
+        # The snapshot is only a cache; the values just read are still good
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return all_values
+
+def clear_snapshot():
+    """Drops the local snapshot after a full rewrite so the next load refetches everything."""
+    try:
+        os.remove(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        pass
+
+def rows_to_frame(header, rows, first_row):
+    """Builds a DataFrame from ragged sheet rows, indexed by their 1-based sheet row numbers ("Row")."""
+    width = len(header)
+    values = np.full((len(rows), width), '', dtype=object)
+    for i, row in enumerate(rows):
+        row = row[:width]
+        values[i, :len(row)] = row
+    return pd.DataFrame(values, columns=header, index=pd.RangeIndex(first_row, first_row + len(rows), name="Row"))
+
+def process_data(df):
+    """Reusable function to coerce the raw string columns read from the sheet."""
+    if df.empty:
         return pd.DataFrame()
     
-    df = pd.DataFrame(records)
     if 'Date' not in df.columns:
         st.error("Data integrity error: 'Date' column is missing from the sheet's header (Row 1).")
         return pd.DataFrame()
 
-    df["Date"] = pd.to_datetime(df["Date"], format="%m/%d/%y", errors='coerce')
-    df.dropna(subset=['Date'], inplace=True)
-    df["P/L"] = pd.to_numeric(df["P/L"], errors='coerce').fillna(0)
-    df["Account Value"] = pd.to_numeric(df["Account Value"], errors='coerce').fillna(0)
-    df = df.sort_values(by="Date", ascending=False).reset_index(drop=True)
+    df["Date"] = pd.to_datetime(df["Date"], format="%m/%d/%y", errors='coerce', cache=True)
+    # Newest first, and within a day the row appended last first; rows with bad dates are dropped in the same take
+    order = np.lexsort((df.index.to_numpy(), df["Date"].to_numpy().view("int64")))[::-1]
+    order = order[df["Date"].notna().to_numpy()[order]]
+    df = df.take(order)
+    df["P/L"] = pd.to_numeric(df["P/L"], errors='coerce').fillna(0).astype("float64")
+    df["Account Value"] = pd.to_numeric(df["Account Value"], errors='coerce').fillna(0).astype("float64")
+    if "Type" in df.columns:
+        # Known types first so every sidebar choice is a category, plus anything else already in the sheet
+        categories = list(dict.fromkeys(TRADE_TYPES + tuple(df["Type"].unique())))
+        df["Type"] = pd.Categorical(df["Type"], categories=categories)
     return df
 
 @st.cache_data(ttl=600)
@@ -46,20 +147,14 @@ def get_initial_data(_client):
     """Fetches only the last 200 records for a fast initial load."""
     if _client is None: return pd.DataFrame()
     try:
-        sheet = _client.open("Trade Tracker Data").sheet1
-        all_values = sheet.get_all_values()
+        sheet = get_worksheet(_client)
+        all_values = load_sheet_values(sheet)
         if len(all_values) <= 1: return pd.DataFrame()
         
         header = all_values[0]
-        data = all_values[-200:]
+        start = max(1, len(all_values) - 200)
         
-        records = []
-        for row in data:
-            while len(row) < len(header):
-                row.append('')
-            records.append(dict(zip(header, row)))
-            
-        return process_data(records)
+        return process_data(rows_to_frame(header, all_values[start:], first_row=start + 1))
     except Exception as e:
         st.error(f"Could not load initial data: {e}")
         return pd.DataFrame()
@@ -70,32 +165,217 @@ def get_full_data(_client):
     """Fetches ALL records from the sheet using the more efficient get_all_values() method."""
     if _client is None: return pd.DataFrame()
     try:
-        sheet = _client.open("Trade Tracker Data").sheet1
-        all_values = sheet.get_all_values()
+        sheet = get_worksheet(_client)
+        all_values = load_sheet_values(sheet)
         if len(all_values) <= 1: return pd.DataFrame()
         
         header = all_values[0]
-        data = all_values[1:]
-        records = [dict(zip(header, row)) for row in data]
-        return process_data(records)
+        return process_data(rows_to_frame(header, all_values[1:], first_row=2))
     except Exception as e:
         st.error(f"Could not load full data: {e}")
         return pd.DataFrame()
 
-def update_gsheet(client, df):
-    """Clears and updates the entire Google Sheet."""
+def invalidate_sheet_cache():
+    """Drops the cached sheet loads, the only st.cache_data entries; everything derived from a frame is recomputed per render."""
+    get_initial_data.clear()
+    get_full_data.clear()
+
+def sheet_rows(df):
+    """Formats df column by column into the rows written back to the sheet; money columns stay numbers."""
+    columns = []
+    for name, col in df.items():
+        if name == "Date":
+            columns.append(col.dt.strftime('%m/%d/%y').tolist())
+        elif name in ("P/L", "Account Value"):
+            # Rounding to cents avoids float artefacts such as 1000.3000000000001 from running totals;
+            # plain floats go out as JSON numbers, so RAW stores numbers as append_row does
+            columns.append(np.round(col.to_numpy(dtype=np.float64), 2).tolist())
+        else:
+            columns.append(col.astype(object).fillna('').astype(str).tolist())
+    return [list(row) for row in zip(*columns)]
+
+def row_runs(rows):
+    """Groups 1-based sheet rows into [start, end] runs of consecutive rows, top to bottom."""
+    runs = []
+    for row in sorted(rows):
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return runs
+
+def sheet_rows_unchanged(sheet, df, rows):
+    """Re-reads the given sheet rows and checks they still hold the trades df has for them."""
+    # Row numbers are captured at load time; rows inserted or removed since, by another session or by hand, shift them
+    runs = row_runs(rows)
+    last_col = column_letter(len(df.columns))
+    # One range per run of consecutive rows keeps the batchGet query string short even when most rows changed
+    fetched = sheet.batch_get([f"A{start}:{last_col}{end}" for start, end in runs])
+    sheet_values = []
+    for (start, end), value_range in zip(runs, fetched):
+        # Sheets leaves out trailing empty rows, so pad each run back to its full length
+        sheet_values += list(value_range) + [[]] * (end - start + 1 - len(value_range))
+    current = rows_to_frame(df.columns.tolist(), sheet_values, first_row=0)
+    expected = df.loc[[row for start, end in runs for row in range(start, end + 1)]]
+    for name in df.columns:
+        if name == "Date":
+            same = pd.to_datetime(current[name], format="%m/%d/%y", errors='coerce').to_numpy() == expected[name].to_numpy()
+        elif name in ("P/L", "Account Value"):
+            same = np.isclose(pd.to_numeric(current[name], errors='coerce').fillna(0).to_numpy(), expected[name].to_numpy(), rtol=0, atol=0.005)
+        else:
+            same = current[name].to_numpy() == expected[name].astype(object).fillna('').astype(str).to_numpy()
+        if not same.all():
+            return False
+    return True
+
+def update_gsheet(client, df, rows, original):
+    """Writes the given sheet rows of df back in place with one batch request; True on success, None if they moved."""
     try:
-        sheet = client.open("Trade Tracker Data").sheet1
-        df_to_save = df.sort_values(by="Date", ascending=True).copy()
-        df_to_save['Date'] = df_to_save['Date'].dt.strftime('%m/%d/%y')
-        sheet.clear()
-        sheet.append_row(df_to_save.columns.tolist())
-        sheet.append_rows(df_to_save.astype(str).values.tolist())
-        st.cache_data.clear()
+        sheet = get_worksheet(client)
+        # original is the frame as loaded, which is what those rows should still hold in the sheet
+        if not sheet_rows_unchanged(sheet, original, rows):
+            return None
+        last_col = column_letter(len(df.columns))
+        # One range per run of consecutive rows; a P/L edit moves every later balance, so runs are usually long
+        data = [
+            {
+                "range": gspread.utils.absolute_range_name(sheet.title, f"A{start}:{last_col}{end}"),
+                "values": sheet_rows(df.loc[list(range(start, end + 1))]),
+            }
+            for start, end in row_runs(rows)
+        ]
+        # RAW keeps dates as the '%m/%d/%y' text the loaders parse, like append_row does for new trades
+        sheet.spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": data})
+        clear_snapshot()
+        invalidate_sheet_cache()
         return True
     except Exception as e:
         st.error(f"🚨 Failed to update sheet: {e}")
         return False
+
+def delete_gsheet_rows(client, df, rows):
+    """Deletes the given 1-based sheet rows with a single batch_update of deleteDimension requests; None if they moved."""
+    try:
+        sheet = get_worksheet(client)
+        if not sheet_rows_unchanged(sheet, df, rows):
+            return None
+        # Bottom-up, so each deletion leaves the row numbers of the runs above it unchanged
+        requests = [
+            {"deleteDimension": {"range": {"sheetId": sheet.id, "dimension": "ROWS", "startIndex": start - 1, "endIndex": end}}}
+            for start, end in reversed(row_runs(rows))
+        ]
+        sheet.spreadsheet.batch_update({"requests": requests})
+        clear_snapshot()
+        invalidate_sheet_cache()
+        return True
+    except Exception as e:
+        st.error(f"🚨 Failed to delete rows: {e}")
+        return False
+
+def reload_after_sheet_change():
+    """Drops every copy of the trades after the sheet changed elsewhere and reruns so the tabs reload them."""
+    clear_snapshot()
+    invalidate_sheet_cache()
+    st.session_state.full_data_loaded = False
+    st.session_state.sheet_changed = True
+    st.rerun()
+
+def drop_sheet_rows(df, rows):
+    """Drops deleted rows locally and shifts the row numbers of the trades below them up."""
+    deleted = np.sort(np.asarray(rows))
+    df = df.drop(rows)
+    remaining = df.index.to_numpy()
+    return df.set_axis(pd.Index(remaining - np.searchsorted(deleted, remaining), name="Row"))
+
+def clear_gsheet(client, columns):
+    """Removes every trade row but keeps the header row, in a single batch_clear call."""
+    try:
+        sheet = get_worksheet(client)
+        last_col = column_letter(len(columns))
+        sheet.batch_clear([f"A2:{last_col}"])
+        clear_snapshot()
+        invalidate_sheet_cache()
+        return True
+    except Exception as e:
+        st.error(f"🚨 Failed to clear sheet: {e}")
+        return False
+
+def get_date_parts(df):
+    """Extracts the year and month of every Date once, as compact int16/int8 arrays."""
+    dates = df["Date"]
+    return dates.dt.year.to_numpy(dtype="int16"), dates.dt.month.to_numpy(dtype="int8")
+
+def get_monthly_summary(years, months, pl, year):
+    """Returns P/L totals and trade counts for months 1-12 of the given year, via np.bincount."""
+    in_year = years == year
+    year_months = months[in_year]
+    pl_by_month = np.bincount(year_months, weights=pl[in_year], minlength=13)[1:]
+    return pl_by_month, np.bincount(year_months, minlength=13)[1:]
+
+def get_period_stats(df, year, month):
+    """Returns (trades, P/L, latest Account Value) for the month, overall and year."""
+    # Rows are sorted newest first, so each period is one contiguous slice found by binary search
+    dates = df["Date"].to_numpy()[::-1]
+    pl = df["P/L"].to_numpy()
+    account_values = df["Account Value"].to_numpy()
+    last_overall = account_values[0]
+
+    def summarize(start, end):
+        bounds = np.array([end, start]).astype(dates.dtype)
+        newest, oldest = len(dates) - np.searchsorted(dates, bounds)
+        last = account_values[newest] if oldest > newest else last_overall
+        return int(oldest - newest), pl[newest:oldest].sum(), last
+
+    month_start = np.datetime64(f"{year}-{month:02d}", "M")
+    year_start = np.datetime64(f"{year}-01", "M")
+    return summarize(month_start, month_start + 1), (len(df), pl.sum(), last_overall), summarize(year_start, year_start + 12)
+
+def get_daily_account_values(df):
+    """Closing Account Value per day, oldest first, for the dashboard chart."""
+    # Dates are day-precision and rows are sorted newest first, so the first row per date is the close
+    daily = df.drop_duplicates(subset="Date", keep="first")
+    return daily.set_index("Date")[["Account Value"]].sort_index()
+
+def apply_edits(df, edits):
+    """Applies edited rows to df and re-runs Account Value; returns the new frame and the sheet rows that changed."""
+    oldest_first = df.iloc[::-1]
+    account = oldest_first["Account Value"].to_numpy()
+    pl = oldest_first["P/L"].to_numpy()
+    # The balance before the oldest trade is a fixed base, so moving any trade's date does not move it
+    opening = account[0] - pl[0]
+    # The part of each later balance change not explained by the trade's P/L: deposits, withdrawals, corrections
+    extra = pd.Series(np.diff(account, prepend=opening) - pl, index=oldest_first.index)
+    # A hand-edited balance is that row's new target, net of its own P/L edit, and carries into every later trade
+    before = df.loc[edits.index]
+    pl_change = edits["P/L"].fillna(0) - before["P/L"]
+    account_change = edits["Account Value"] - before["Account Value"]
+    hand_edited = ~np.isclose(account_change.to_numpy(), 0, rtol=0, atol=0.005)
+    extra = extra.add((account_change - pl_change)[hand_edited], fill_value=0)
+    edited_rows = edits.compare(before[edits.columns]).index
+
+    new_df = df.copy()
+    new_df.loc[edits.index, edits.columns] = edits
+    new_df["P/L"] = new_df["P/L"].fillna(0)
+    # An edited date can move a trade, so restore the newest-first order before re-running the totals
+    new_df = new_df.sort_values(by=["Date", "Row"], ascending=False)
+    running = opening + np.cumsum(new_df["P/L"].to_numpy()[::-1] + extra.reindex(new_df.index).to_numpy()[::-1])
+    new_df["Account Value"] = np.round(running[::-1], 2)
+
+    moved = ~np.isclose(new_df["Account Value"].to_numpy(), df["Account Value"].reindex(new_df.index).to_numpy(), rtol=0, atol=0.005)
+    return new_df, edited_rows.union(new_df.index[moved])
+
+def prepend_trade(df, row, sheet_row):
+    """Adds a row that was just appended to the sheet at sheet_row to the in-memory DataFrame."""
+    new_trade = pd.DataFrame([row], columns=df.columns, index=pd.Index([sheet_row], name="Row"))
+    new_trade["Date"] = pd.Timestamp(datetime.strptime(row[0], "%m/%d/%y"))
+    if "Type" in df.columns:
+        new_trade["Type"] = new_trade["Type"].astype(df["Type"].dtype)
+    df = pd.concat([new_trade, df])
+    # New trades are usually the newest, so only back-dated entries need the frame re-sorted
+    if len(df) > 1 and df["Date"].iat[0] < df["Date"].iat[1]:
+        df = df.sort_values(by=["Date", "Row"], ascending=False)
+    return df
+
 # --- Machine Learning Functions ---
 def aggregate_data_for_model(df):
     """Aggregates raw trade data into a weekly format for the ML model."""
@@ -144,7 +424,8 @@ def train_and_predict(df):
     X = weekly_df[features]
     y = weekly_df[target]
     
-    # Create and train the Linear Regression model
+    # Create and train the Linear Regression model; scikit-learn is imported here so cold starts skip it
+    from sklearn.linear_model import LinearRegression
     model = LinearRegression()
     model.fit(X, y)
     
@@ -158,6 +439,7 @@ def train_and_predict(df):
 
 # --- Main App Logic ---
 st.markdown("<h1 style='text-align: center;'>Trade Tracker</h1>", unsafe_allow_html=True)
+now = datetime.now()
 
 if 'full_data_loaded' not in st.session_state:
     st.session_state.full_data_loaded = False
@@ -174,74 +456,74 @@ with st.sidebar:
     with st.form("trade_form", clear_on_submit=True):
         date = st.date_input("Date")
         position = st.text_input("Position")
-        trade_type = st.selectbox("Type", ["Stock", "Option", "Crypto", "ETF", "Other"])
+        trade_type = st.selectbox("Type", TRADE_TYPES)
         pl = st.number_input("Profit / Loss", value=0.0, step=0.01)
         notes = st.text_area("Notes")
 
         submitted = st.form_submit_button("Submit", disabled=(client is None))
         if submitted:
-            sheet = client.open("Trade Tracker Data").sheet1
+            sheet = get_worksheet(client)
             trades_df_for_calc = st.session_state.trades_df
             dt_str = date.strftime("%m/%d/%y")
             last_val = trades_df_for_calc["Account Value"].iloc[0] if not trades_df_for_calc.empty else 0
             new_val = last_val + pl
             
-            sheet.append_row([dt_str, position, trade_type, pl, notes, new_val])
+            new_row = [dt_str, position, trade_type, pl, notes, new_val]
+            # Point Sheets at the last known trade row so it does not have to search the whole sheet for the table end
+            table_range = f"A{trades_df_for_calc.index.max()}" if not trades_df_for_calc.empty else None
+            response = sheet.append_row(new_row, insert_data_option="INSERT_ROWS", table_range=table_range)
+            # e.g. "Sheet1!A42:F42"; the row number keeps the in-memory frame addressable for deletes
+            updated_range = response["updates"]["updatedRange"].split("!")[-1]
+            sheet_row = gspread.utils.a1_to_rowcol(updated_range.split(":")[0])[0]
             st.success("✅ Trade added!")
             
-            st.cache_data.clear()
-            st.session_state.full_data_loaded = False
-            st.session_state.trades_df = pd.DataFrame()
+            # The sheet copy changed, so drop cached loads, but patch the in-memory frame instead of refetching it
+            invalidate_sheet_cache()
+            if trades_df_for_calc.empty:
+                st.session_state.full_data_loaded = False
+                st.session_state.trades_df = pd.DataFrame()
+            else:
+                st.session_state.trades_df = prepend_trade(trades_df_for_calc, new_row, sheet_row)
             st.rerun()
 
 # --- Main Content Tabs ---
-tab_titles = ["Dashboard", "All Trades", "Historical Overview", "Prediction"]
-tabs = st.tabs(tab_titles)
-
+# Each tab is a fragment, so a widget inside one tab only reruns that tab
 # Dashboard Tab
-with tabs[0]:
+@st.fragment
+def render_dashboard():
     st.subheader("Dashboard")
     dashboard_df = st.session_state.trades_df
     if not dashboard_df.empty:
         if not st.session_state.full_data_loaded:
             st.info("ℹ️ Dashboard is showing stats based on recent trades. For a full overview, select another tab.")
 
-        now = datetime.now()
-        month_df = dashboard_df[(dashboard_df["Date"].dt.month == now.month) & (dashboard_df["Date"].dt.year == now.year)]
-        year_df = dashboard_df[dashboard_df["Date"].dt.year == now.year]
-        overall_pl = dashboard_df["P/L"].sum()
-        monthly_pl = month_df["P/L"].sum()
-        yearly_pl = year_df["P/L"].sum()
-        last_overall = dashboard_df["Account Value"].iloc[0]
-        last_month = month_df["Account Value"].iloc[0] if not month_df.empty else last_overall
-        last_year = year_df["Account Value"].iloc[0] if not year_df.empty else last_overall
-
-        c1, c2, c3 = st.columns(3)
-        def card(col, title, trades, pl, last):
+        month_stats, overall_stats, year_stats = get_period_stats(dashboard_df, now.year, now.month)
+
+        def card(title, trades, pl, last):
             arrow = "▼" if pl < 0 else "▲"
             color = "#FF3333" if pl < 0 else "#00FF00"
-            col.markdown(f"""
+            return f"""
             <div style='background-color:#1e1e1e; padding:15px; border-radius:10px; text-align:center; color:white; border: 1px solid #2a2a2a;'>
                 <h4>{title}</h4>
                 <p style='font-size:18px;'><strong>Value:</strong> ${last:,.2f}</p>
                 <p style='font-size:22px; color:{color};'><strong>P/L: {arrow} ${abs(pl):,.2f}</strong></p>
                 <p><strong>Trades:</strong> {trades}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            </div>"""
 
-        card(c1, "📅 This Month", len(month_df), monthly_pl, last_month)
-        card(c2, "💼 Overall", len(dashboard_df), overall_pl, last_overall)
-        card(c3, "📆 This Year", len(year_df), yearly_pl, last_year)
+        # One markdown call for all three cards; the HTML must not contain blank lines or the block ends early
+        cards = card("📅 This Month", *month_stats) + card("💼 Overall", *overall_stats) + card("📆 This Year", *year_stats)
+        st.markdown(f"<div style='display:grid; grid-template-columns:repeat(3, 1fr); gap:1rem;'>{cards}\n</div>", unsafe_allow_html=True)
 
         st.markdown("---")
         st.subheader("Account Value Over Time")
-        chart_data = dashboard_df.set_index("Date")[["Account Value"]].sort_index()
+        chart_data = get_daily_account_values(dashboard_df)
         st.line_chart(chart_data)
     else:
         st.warning("No data to display.")
 
 # All Trades Tab
-with tabs[1]:
+@st.fragment
+def render_all_trades(client):
     st.subheader("All Trades")
     if not st.session_state.full_data_loaded:
         with st.spinner("Loading all trades..."):
@@ -250,11 +532,9 @@ with tabs[1]:
             st.rerun()
 
     trades_df = st.session_state.trades_df
+    if st.session_state.pop("sheet_changed", False):
+        st.warning("⚠️ The sheet changed since it was loaded, so nothing was written. The trades have been reloaded; please try again.")
     if not trades_df.empty:
-        # Add the "Select" column to the DataFrame for editing
-        df_for_editing = trades_df.copy()
-        df_for_editing.insert(0, "Select", False)
-
         if 'page' not in st.session_state:
             st.session_state.page = 0
 
@@ -262,7 +542,9 @@ with tabs[1]:
         start_idx = st.session_state.page * items_per_page
         end_idx = start_idx + items_per_page
         
-        paginated_df = df_for_editing.iloc[start_idx:end_idx]
+        # Copy only the visible page and add the "Select" column to it for editing
+        paginated_df = trades_df.iloc[start_idx:end_idx].copy()
+        paginated_df.insert(0, "Select", False)
         
         # Edit the paginated chunk
         edited_chunk = st.data_editor(
@@ -279,42 +561,48 @@ with tabs[1]:
 
         col1, col2, col3, col4 = st.columns([1, 1, 3, 3])
         if col1.button("⬅️ Previous", disabled=(st.session_state.page == 0)):
-            st.session_state.page -= 1; st.rerun()
+            st.session_state.page -= 1; st.rerun(scope="fragment")
         if col2.button("Next ➡️", disabled=(end_idx >= len(trades_df))):
-            st.session_state.page += 1; st.rerun()
+            st.session_state.page += 1; st.rerun(scope="fragment")
         col4.write(f"Showing rows {start_idx+1}–{min(end_idx, len(trades_df))} of {len(trades_df)}")
 
         st.divider()
 
         b_col1, b_col2, b_col3 = st.columns(3)
         if b_col1.button("💾 Save Edits"):
-            # Before saving, apply the edits from the chunk back to the main DataFrame
-            st.session_state.trades_df.update(edited_chunk)
-            # We don't need to save the "Select" column to the Google Sheet
-            df_to_save = st.session_state.trades_df.drop(columns=['Select'], errors='ignore')
-            if update_gsheet(client, df_to_save):
-                st.success("Saved!"); st.rerun()
+            # Only the edited rows, and any later rows whose Account Value moved with them, are written back
+            saved_df, changed_rows = apply_edits(trades_df, edited_chunk.drop(columns="Select"))
+            if len(changed_rows) == 0:
+                st.info("No changes to save.")
+            else:
+                saved = update_gsheet(client, saved_df, changed_rows, trades_df)
+                if saved is None:
+                    reload_after_sheet_change()
+                elif saved:
+                    st.session_state.trades_df = saved_df
+                    st.success("Saved!"); st.rerun()
 
         if b_col2.button("🗑️ Delete Selected"):
-            # Get the indices of selected rows from the edited chunk
-            selected_indices = edited_chunk[edited_chunk["Select"]].index
-            # Drop those indices from the main DataFrame in session state
-            st.session_state.trades_df = st.session_state.trades_df.drop(selected_indices)
-            # Save the updated main DataFrame (without the "Select" column)
-            df_to_save = st.session_state.trades_df.drop(columns=['Select'], errors='ignore')
-            if update_gsheet(client, df_to_save):
+            # The index of the edited chunk holds each selected trade's sheet row number
+            selected_rows = edited_chunk[edited_chunk["Select"]].index
+            # Delete just those rows in the sheet, then mirror the deletion in session state
+            deleted = delete_gsheet_rows(client, trades_df, selected_rows) if len(selected_rows) else False
+            if deleted is None:
+                reload_after_sheet_change()
+            elif deleted:
+                st.session_state.trades_df = drop_sheet_rows(st.session_state.trades_df, selected_rows)
                 st.success("Deleted!"); st.rerun()
                 
         if b_col3.button("⚠️ Clear All"):
-            st.session_state.trades_df = pd.DataFrame(columns=trades_df.columns)
-            df_to_save = st.session_state.trades_df.drop(columns=['Select'], errors='ignore')
-            if update_gsheet(client, df_to_save):
+            if clear_gsheet(client, trades_df.columns):
+                st.session_state.trades_df = pd.DataFrame(columns=trades_df.columns)
                 st.success("Cleared!"); st.rerun()
     else:
         st.warning("No data to display.")
 
 # Historical Overview Tab
-with tabs[2]:
+@st.fragment
+def render_historical(client):
     st.subheader("Historical Overview")
     if not st.session_state.full_data_loaded:
         with st.spinner("Loading all trades..."):
@@ -324,54 +612,41 @@ with tabs[2]:
     
     trades_df = st.session_state.trades_df
     if not trades_df.empty:
-        yrs = sorted(trades_df["Date"].dt.year.unique(), reverse=True)
+        years, months = get_date_parts(trades_df)
+        yrs = np.unique(years)[::-1].tolist()
         sel_year = st.selectbox("Select Year", yrs, key="historical_year")
         
-        dfy = trades_df[trades_df["Date"].dt.year == sel_year].copy()
-        dfy['Month'] = dfy['Date'].dt.month
-        
-        monthly_summary = dfy.groupby('Month').agg(PL=('P/L', 'sum'),Trades=('P/L', 'count')).reset_index()
-        all_months_df = pd.DataFrame({'Month': range(1, 13)})
-        monthly_summary = pd.merge(all_months_df, monthly_summary, on='Month', how='left').fillna(0)
+        pl_by_month, trades_by_month = get_monthly_summary(years, months, trades_df["P/L"].to_numpy(), sel_year)
         
-        # Convert the summary to a list of dictionaries to iterate through
-        months_data = monthly_summary.to_dict('records')
-        
-        # ### NEW ROW-BY-ROW LAYOUT ###
-        # Iterate through the data in chunks of 4 to create rows
-        for i in range(0, 12, 4):
-            # Get the data for the next row of months
-            chunk = months_data[i:i+4]
-            
-            # Create a new row of columns
-            cols = st.columns(4)
-            
-            # Populate each column in this row
-            for j, month_data in enumerate(chunk):
-                with cols[j]:
-                    month_num = int(month_data['Month'])
-                    month_name = datetime(1900, month_num, 1).strftime('%B')
-                    plm = month_data['PL']
-                    trade_count = int(month_data['Trades'])
-                    
-                    if trade_count == 0: bg_color = "#1e1e1e"
-                    elif plm < 0: bg_color = "#660000"
-                    else: bg_color = "#003300"
-                    pl_color = "#FF3333" if plm < 0 else "white"
-
-                    st.markdown(f"""
-                    <div style='background-color:{bg_color}; padding: 15px; border-radius: 12px; text-align: center; color: white; margin-bottom: 10px;'>
-                        <h5>{month_name}</h5>
-                        <h4 style='color: {pl_color};'>${plm:,.2f}</h4>
-                        <p>Trades: {trade_count}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+        # Build every card first so the whole grid is emitted with a single markdown call
+        cards = []
+        for month_name, plm, trade_count in zip(MONTH_NAMES, pl_by_month, trades_by_month):
+            if trade_count == 0: bg_color = "#1e1e1e"
+            elif plm < 0: bg_color = "#660000"
+            else: bg_color = "#003300"
+            pl_color = "#FF3333" if plm < 0 else "white"
+
+            cards.append(f"""
+            <div class='month-card' style='background-color:{bg_color};'>
+                <h5>{month_name}</h5>
+                <h4 style='color: {pl_color};'>${plm:,.2f}</h4>
+                <p>Trades: {trade_count}</p>
+            </div>""")
+
+        # One markdown call for the whole 4x3 grid; the shared card style is sent once instead of on every card.
+        # The HTML must not contain blank lines or the block ends early, and </style> closes its own HTML block,
+        # so it needs a line break after it or the indented cards that follow are parsed as a code block
+        st.markdown(
+            "<style>.month-card{padding:15px; border-radius:12px; text-align:center; color:white; margin-bottom:10px;}</style>\n"
+            f"<div style='display:grid; grid-template-columns:repeat(4, 1fr); column-gap:1rem;'>{''.join(cards)}\n</div>",
+            unsafe_allow_html=True,
+        )
     else:
         st.warning("No data available.")
 
-
 # Prediction Tab
-with tabs[3]:
+@st.fragment
+def render_prediction(client):
     st.subheader("Next Week's Profit Prediction")
 
     # Ensure full data is loaded before attempting to predict
@@ -406,3 +681,14 @@ with tabs[3]:
             st.warning(status_message)
     else:
         st.warning("No data available to make a prediction.")
+
+tab_titles = ["Dashboard", "All Trades", "Historical Overview", "Prediction"]
+tabs = st.tabs(tab_titles)
+with tabs[0]:
+    render_dashboard()
+with tabs[1]:
+    render_all_trades(client)
+with tabs[2]:
+    render_historical(client)
+with tabs[3]:
+    render_prediction(client)